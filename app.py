@@ -7,10 +7,19 @@ import os
 import json
 import secrets
 import re
-from datetime import datetime
-from functools import wraps
-
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache, wraps
+from pathlib import Path
+
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, session, flash, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from markupsafe import escape
 from authlib.integrations.flask_client import OAuth
 
 # Anthropic API for AI generation
@@ -21,6 +30,22 @@ except ImportError:
     HAS_ANTHROPIC = False
     Anthropic = None
 
+# orjson for faster JSON request parsing and response serialization (optional)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+    orjson = None
+
+# Response compression for HTML/JSON payloads (optional)
+try:
+    from flask_compress import Compress
+    HAS_COMPRESS = True
+except ImportError:
+    HAS_COMPRESS = False
+    Compress = None
+
 # Import proposal generation modules (optional - for AI generation)
 try:
     from generator import ProposalGenerator
@@ -31,37 +56,182 @@ except ImportError:
     ProposalGenerator = None
     ProposalAssembler = None
 
+# Shared assembler - loads the template and CSS once per worker instead of per request
+if HAS_GENERATOR:
+    _templates_dir = Path(__file__).parent / 'templates'
+    _ASSEMBLER = ProposalAssembler(_templates_dir / 'template.html', _templates_dir / 'proposal.css')
+else:
+    _ASSEMBLER = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that routes request.json and jsonify through orjson"""
+
+    def _dumps_bytes(self, obj, sort_keys=None, indent=None):
+        """orjson.dumps with the json.dumps options Flask uses mapped onto orjson flags"""
+        # Dates go through self.default, so they keep Flask's HTTP-date format
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            # orjson only supports two-space indentation
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        return self._dumps_bytes(obj, kwargs.get('sort_keys'), kwargs.get('indent')).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Same argument handling as DefaultJSONProvider.response
+        if args and kwargs:
+            raise TypeError('app.json.response() takes either args or kwargs, not both')
+        if not args and not kwargs:
+            obj = None
+        elif len(args) == 1:
+            obj = args[0]
+        else:
+            obj = args or kwargs
+
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._dumps_bytes(obj, indent=indent) + b'\n', mimetype=self.mimetype)
+
+
+class LRUCache:
+    """Small thread-safe LRU cache with optional per-entry expiry (ttl in seconds)"""
+
+    def __init__(self, maxsize, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and time.time() >= expires:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+def _load_secret_key(path):
+    """Read the session secret key from path, creating it on first start.
+
+    The key is written to a temp file and hard-linked into place, so workers
+    starting together all end up with the same key. If the file cannot be
+    read or written (e.g. a read-only filesystem), a per-process key is used.
+    """
+    path = Path(path)
+    try:
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f'{path.name}.{os.getpid()}')
+            # Left over from a crashed start with the same pid
+            tmp.unlink(missing_ok=True)
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(secrets.token_bytes(32))
+            try:
+                os.link(tmp, path)
+            except FileExistsError:
+                pass
+            finally:
+                tmp.unlink()
+        return path.read_bytes()
+    except OSError as e:
+        print(f"Warning: could not use secret key file {path} ({e}); sessions will not "
+              f"survive restarts or be shared between workers - set SECRET_KEY")
+        return secrets.token_bytes(32)
+
+
+# Environment settings resolved once at startup rather than per request
+IS_DEV = os.environ.get('FLASK_ENV') == 'development'
+PORT = int(os.environ.get('PORT', 5000))
+
 app = Flask(__name__)
-app.secret_key = os.environ.get('SECRET_KEY', secrets.token_hex(32))
+if HAS_ORJSON:
+    app.json = OrjsonProvider(app)
+
+# Response compression via Flask-Compress (pinned in requirements.txt)
+COMPRESS_MIMETYPES = ['text/html', 'text/css', 'application/javascript', 'application/json']
+COMPRESS_MIN_SIZE = 500
+if HAS_COMPRESS:
+    app.config['COMPRESS_MIMETYPES'] = COMPRESS_MIMETYPES
+    app.config['COMPRESS_MIN_SIZE'] = COMPRESS_MIN_SIZE
+    Compress(app)
+
+# Without SECRET_KEY, keep a generated key on disk so sessions survive restarts and
+# are shared by every worker
+app.secret_key = os.environ.get('SECRET_KEY') or _load_secret_key(
+    os.environ.get('SECRET_KEY_FILE') or os.path.join(app.instance_path, 'secret.key')
+)
+
+# Template caching - skip freshness checks and keep compiled bytecode outside development
+if not IS_DEV:
+    app.config['TEMPLATES_AUTO_RELOAD'] = False
+    app.jinja_env.auto_reload = False
+    # Without JINJA_CACHE, Jinja uses its own per-user 0700 directory and checks
+    # its ownership, since the cached bytecode is unmarshalled and executed
+    jinja_cache_dir = os.environ.get('JINJA_CACHE')
+    if jinja_cache_dir:
+        os.makedirs(jinja_cache_dir, mode=0o700, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory=jinja_cache_dir)
+
+    # Warm the template cache so the first request is not slower than steady-state
+    for template_name in ('web/index.html', 'web/dashboard.html', 'web/create.html'):
+        app.jinja_env.get_template(template_name)
 
 # OAuth Setup
 oauth = OAuth(app)
 
-# Google OAuth configuration
-if os.environ.get('GOOGLE_CLIENT_ID'):
-    google = oauth.register(
+# Google OAuth configuration - the client is registered on first use
+OAUTH_ENABLED = bool(os.environ.get('GOOGLE_CLIENT_ID'))
+
+
+@lru_cache(maxsize=1)
+def get_google():
+    """Register and return the Google OAuth client"""
+    return oauth.register(
         name='google',
         client_id=os.environ.get('GOOGLE_CLIENT_ID'),
         client_secret=os.environ.get('GOOGLE_CLIENT_SECRET'),
         access_token_url='https://accounts.google.com/o/oauth2/token',
         authorize_url='https://accounts.google.com/o/oauth2/auth',
         api_base_url='https://www.googleapis.com/oauth2/v1/',
-        client_kwargs={'scope': 'email profile'},
+        client_kwargs={'scope': 'openid email profile'},
         server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
     )
-else:
-    google = None
+
 
 # Allowed email domains for staff access
-ALLOWED_DOMAINS = os.environ.get('ALLOWED_DOMAINS', 'mediaforce.ca').split(',')
+ALLOWED_DOMAINS = frozenset(d.strip().lower() for d in os.environ.get('ALLOWED_DOMAINS', 'mediaforce.ca').split(','))
+
+# Auth bypass flags (resolved once at startup): SKIP_AUTH=true auto-logs in from the
+# landing page; protected views are only opened up without a session in development
+SKIP_AUTH = os.environ.get('SKIP_AUTH', '').lower() == 'true'
+DEV_AUTH_BYPASS = IS_DEV and SKIP_AUTH
 
 
 def login_required(f):
     """Decorator to require authentication"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Skip auth in development mode
-        if os.environ.get('FLASK_ENV') == 'development' and os.environ.get('SKIP_AUTH'):
+        if DEV_AUTH_BYPASS:
             return f(*args, **kwargs)
 
         if 'user' not in session:
@@ -74,15 +244,55 @@ def is_allowed_user(email):
     """Check if user email is from allowed domain"""
     if not email:
         return False
-    domain = email.split('@')[-1]
-    return domain in ALLOWED_DOMAINS
+    return email.rpartition('@')[2].lower() in ALLOWED_DOMAINS
+
+
+def get_json_object():
+    """Return the request body as a dict, or None if it is not a JSON object"""
+    payload = request.get_json(silent=True)
+    return payload if isinstance(payload, dict) else None
+
+
+def _json_bytes(value):
+    """Serialize value to JSON bytes"""
+    return orjson.dumps(value) if HAS_ORJSON else json.dumps(value).encode()
+
+
+def json_html_stream(chunks):
+    """Yield {"html": ..., "success": true} as bytes, JSON-escaping each HTML chunk as it arrives.
+
+    The success flag comes last, so an error while rendering still closes the
+    document as valid JSON with "success": false and the error message.
+    """
+    yield b'{"html":"'
+    try:
+        for chunk in chunks:
+            yield _json_bytes(chunk)[1:-1]
+    except Exception as e:
+        print(f"Streaming error: {e}")
+        yield b'","success":false,"error":' + _json_bytes(str(e)) + b'}'
+        return
+    yield b'","success":true}'
+
+
+# Appended to a streamed text/html page when rendering fails part way through
+HTML_STREAM_ERROR_MARKER = '<!-- STREAM ERROR -->'
+
+
+def html_stream(chunks):
+    """Yield HTML chunks, ending with HTML_STREAM_ERROR_MARKER and the message if rendering fails"""
+    try:
+        yield from chunks
+    except Exception as e:
+        print(f"Streaming error: {e}")
+        yield f'{HTML_STREAM_ERROR_MARKER}<p>Proposal generation failed: {escape(str(e))}</p>'
 
 
 @app.route('/')
 def index():
     """Landing page"""
     # Auto-login if SKIP_AUTH is enabled
-    if os.environ.get('SKIP_AUTH', '').lower() == 'true':
+    if SKIP_AUTH:
         if 'user' not in session:
             session['user'] = {
                 'email': 'staff@mediaforce.ca',
@@ -98,9 +308,9 @@ def index():
 @app.route('/login')
 def login():
     """Initiate Google OAuth login"""
-    if not google:
+    if not OAUTH_ENABLED:
         # Development mode - auto-login
-        if os.environ.get('FLASK_ENV') == 'development':
+        if IS_DEV:
             session['user'] = {
                 'email': 'dev@mediaforce.ca',
                 'name': 'Development User'
@@ -109,17 +319,20 @@ def login():
         return "OAuth not configured", 500
 
     redirect_uri = url_for('authorize', _external=True)
-    return google.authorize_redirect(redirect_uri)
+    return get_google().authorize_redirect(redirect_uri)
 
 
 @app.route('/authorize')
 def authorize():
     """Handle OAuth callback"""
-    if not google:
+    if not OAUTH_ENABLED:
         return redirect(url_for('dashboard'))
 
+    google = get_google()
     token = google.authorize_access_token()
-    user_info = google.get('userinfo').json()
+    # The openid scope puts the verified ID token claims in the token response,
+    # so the userinfo endpoint is only hit if they are missing
+    user_info = token.get('userinfo') or google.get('userinfo').json()
 
     if not is_allowed_user(user_info.get('email')):
         flash('Access denied. Only Mediaforce staff can use this application.', 'error')
@@ -154,7 +367,8 @@ def dashboard():
 def create_proposal():
     """Create a new proposal"""
     if request.method == 'GET':
-        return render_template('web/create.html', user=session.get('user'))
+        return render_template('web/create.html', user=session.get('user'),
+                               stream_error_marker=HTML_STREAM_ERROR_MARKER)
 
     # Handle form submission
     try:
@@ -170,20 +384,22 @@ def create_proposal():
 @app.route('/api/generate', methods=['POST'])
 @login_required
 def api_generate():
-    """API endpoint to generate proposal HTML"""
+    """API endpoint to generate proposal HTML.
+
+    Returns the page as text/html; errors are JSON with a 4xx/5xx status.
+    """
     try:
-        metadata = request.json
+        metadata = get_json_object()
+        if metadata is None:
+            return jsonify({'success': False, 'error': 'Request body must be a JSON object'}), 400
 
-        if HAS_GENERATOR and ProposalAssembler:
-            assembler = ProposalAssembler()
-            html_content = assembler.generate(metadata)
+        # Assembled here, inside the try, so a failure is reported as a JSON error
+        if _ASSEMBLER:
+            html = cached_assembled_proposal(metadata)
         else:
-            html_content = generate_simple_preview(metadata)
+            html = cached_simple_preview(metadata)
 
-        return jsonify({
-            'success': True,
-            'html': html_content
-        })
+        return Response(html, mimetype='text/html')
     except Exception as e:
         return jsonify({
             'success': False,
@@ -196,8 +412,11 @@ def api_generate():
 def api_preview():
     """Generate a preview of the proposal"""
     try:
-        metadata = request.json
-        preview_html = generate_simple_preview(metadata)
+        metadata = get_json_object()
+        if metadata is None:
+            return jsonify({'success': False, 'error': 'Request body must be a JSON object'}), 400
+
+        preview_html = cached_simple_preview(metadata)
 
         return jsonify({
             'success': True,
@@ -210,22 +429,70 @@ def api_preview():
         }), 500
 
 
+@app.route('/api/preview.html')
+@login_required
+def api_preview_html():
+    """Stream the preview as text/html, so it can be used directly as an iframe src.
+
+    Takes the same fields as /api/preview from the query string, e.g.
+    /api/preview.html?client_name=Acme&pain_points=...
+    """
+    try:
+        stream = stream_simple_preview(request.args)
+        return Response(stream_with_context(html_stream(stream)), mimetype='text/html')
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/generate-from-text.html', methods=['POST'])
+@login_required
+def api_generate_from_text_html():
+    """Stream the proposal for pasted text as text/html; create.html writes it into its preview frame"""
+    try:
+        payload = get_json_object()
+        if payload is None:
+            return jsonify({'success': False, 'error': 'Request body must be a JSON object'}), 400
+
+        text = payload.get('text', '')
+        if not text:
+            return jsonify({'success': False, 'error': 'No text provided'}), 400
+
+        # Waits for every AI shard by default, so an AI failure falls back to the
+        # template proposal; "progressive": true sends sections as their shards
+        # arrive instead, leaving a failed shard's sections unavailable
+        if payload.get('progressive'):
+            chunks = generate_proposal_from_text(text, progressive=True)
+        else:
+            chunks = generate_proposal_from_text(text, stream=True)
+        return Response(stream_with_context(html_stream(chunks)), mimetype='text/html')
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @app.route('/api/generate-from-text', methods=['POST'])
 @login_required
 def api_generate_from_text():
     """Generate proposal from pasted text"""
     try:
-        text = request.json.get('text', '')
+        payload = get_json_object()
+        if payload is None:
+            return jsonify({'success': False, 'error': 'Request body must be a JSON object'}), 400
+
+        text = payload.get('text', '')
         if not text:
             return jsonify({'success': False, 'error': 'No text provided'}), 400
 
-        # Parse the text and generate proposal
-        html = generate_proposal_from_text(text)
+        # Parse the text and generate proposal; the AI call happens here, the
+        # rendered page is streamed into the JSON envelope as it is produced
+        chunks = generate_proposal_from_text(text, stream=True)
 
-        return jsonify({
-            'success': True,
-            'html': html
-        })
+        return Response(stream_with_context(json_html_stream(chunks)), mimetype='application/json')
     except Exception as e:
         return jsonify({
             'success': False,
@@ -233,10 +500,52 @@ def api_generate_from_text():
         }), 500
 
 
+# Patterns used when parsing client briefs and AI output, compiled once at import
+_BUDGET_RE = re.compile(r'\$?([\d,]+)')
+_LEADING_HEADER_RE = re.compile(r'^<h[23][^>]*>[^<]*</h[23]>\s*', re.IGNORECASE)
+
+
+# Brief header keywords by field, in priority order - when a line contains keywords
+# for several fields, the earliest field in this list wins
+_HEADER_KEYWORDS = (
+    ('company', ('company:', 'business:', 'client:', 'name:')),
+    ('industry', ('industry:', 'sector:')),
+    ('location', ('location:', 'city:', 'address:')),
+    ('budget', ('budget:', 'investment:', 'spend:')),
+    ('website', ('website:', 'url:', 'site:')),
+    ('contact', ('contact:', 'email:', 'phone:')),
+    ('audience', ('audience:', 'target:', 'customer')),
+    ('challenges', ('challenge', 'problem', 'pain', 'issue', 'struggle')),
+    ('goals', ('goal', 'objective', 'target', 'want', 'aim')),
+    ('services', ('service', 'need', 'looking for', 'interest')),
+    ('competitors', ('competitor', 'competition')),
+)
+_BULLET_CHARS = frozenset('-•*')
+_BULLET_PREFIX = '-•* '
+# List fields that collect bullet lines, and the subset that also collects plain lines
+_BULLET_FIELDS = frozenset(('challenges', 'goals', 'services', 'competitors'))
+_CONTINUATION_FIELDS = frozenset(('challenges', 'goals'))
+_LABEL_FIELDS = frozenset(('company', 'industry', 'location', 'budget', 'website', 'contact'))
+_KEYWORD_RANK = {keyword: rank for rank, (_, keywords) in enumerate(_HEADER_KEYWORDS) for keyword in keywords}
+# Zero-width lookahead so overlapping keywords ('target:' / 'target') are all seen;
+# alternatives are in priority order so each position reports its best keyword
+_HEADER_RE = re.compile('(?=(%s))' % '|'.join(re.escape(k) for k in _KEYWORD_RANK))
+
+
+def _match_header(lower):
+    """Return the field whose header keywords appear in a lowercased line, or None"""
+    rank = min((_KEYWORD_RANK[m.group(1)] for m in _HEADER_RE.finditer(lower)), default=None)
+    return None if rank is None else _HEADER_KEYWORDS[rank][0]
+
+
+def _after_colon(line):
+    """Return the value part of a 'Label: value' line, or the line unchanged if it has no label"""
+    idx = line.find(':')
+    return line[idx + 1:].lstrip() if idx > 0 else line
+
+
 def parse_client_text(text):
     """Parse free-form text to extract client information"""
-    import re
-
     data = {
         'company': '',
         'industry': '',
@@ -251,71 +560,45 @@ def parse_client_text(text):
         'competitors': []
     }
 
-    lines = text.strip().split('\n')
+    # Lowercase the whole brief once and walk original/lowercase lines in step
+    text = text.strip()
+    lines = zip(text.split('\n'), text.lower().split('\n'))
     current_section = None
 
-    for line in lines:
+    for line, lower in lines:
         line = line.strip()
         if not line:
             continue
 
-        lower = line.lower()
+        lower = lower.strip()
 
         # Detect section headers
-        if any(x in lower for x in ['company:', 'business:', 'client:', 'name:']):
-            data['company'] = re.sub(r'^[^:]+:\s*', '', line)
-            current_section = None
-        elif any(x in lower for x in ['industry:', 'sector:']):
-            data['industry'] = re.sub(r'^[^:]+:\s*', '', line)
-            current_section = None
-        elif any(x in lower for x in ['location:', 'city:', 'address:']):
-            data['location'] = re.sub(r'^[^:]+:\s*', '', line)
-            current_section = None
-        elif any(x in lower for x in ['budget:', 'investment:', 'spend:']):
-            data['budget'] = re.sub(r'^[^:]+:\s*', '', line)
-            current_section = None
-        elif any(x in lower for x in ['website:', 'url:', 'site:']):
-            data['website'] = re.sub(r'^[^:]+:\s*', '', line)
+        field = _match_header(lower)
+        if field in _LABEL_FIELDS:
+            data[field] = _after_colon(line)
             current_section = None
-        elif any(x in lower for x in ['contact:', 'email:', 'phone:']):
-            data['contact'] = re.sub(r'^[^:]+:\s*', '', line)
-            current_section = None
-        elif any(x in lower for x in ['audience:', 'target:', 'customer']):
+        elif field == 'audience':
             if ':' in line:
-                data['audience'] = re.sub(r'^[^:]+:\s*', '', line)
+                data['audience'] = _after_colon(line)
             current_section = 'audience'
-        elif any(x in lower for x in ['challenge', 'problem', 'pain', 'issue', 'struggle']):
-            current_section = 'challenges'
-        elif any(x in lower for x in ['goal', 'objective', 'target', 'want', 'aim']):
-            current_section = 'goals'
-        elif any(x in lower for x in ['service', 'need', 'looking for', 'interest']):
+        elif field == 'services':
             if ':' in line:
-                services_text = re.sub(r'^[^:]+:\s*', '', line)
-                data['services'] = [s.strip() for s in re.split(r'[,;]', services_text) if s.strip()]
+                services_text = _after_colon(line)
+                data['services'] = [s.strip() for s in services_text.replace(';', ',').split(',') if s.strip()]
             current_section = 'services'
-        elif any(x in lower for x in ['competitor', 'competition']):
-            current_section = 'competitors'
-        elif line.startswith('-') or line.startswith('•') or line.startswith('*'):
+        elif field:
+            current_section = field
+        elif line[0] in _BULLET_CHARS:
             # Bullet point - add to current section
-            item = line.lstrip('-•* ').strip()
-            if current_section == 'challenges':
-                data['challenges'].append(item)
-            elif current_section == 'goals':
-                data['goals'].append(item)
-            elif current_section == 'services':
-                data['services'].append(item)
-            elif current_section == 'competitors':
-                data['competitors'].append(item)
-        elif current_section and line:
+            if current_section in _BULLET_FIELDS:
+                data[current_section].append(line.lstrip(_BULLET_PREFIX).lstrip())
+        elif current_section in _CONTINUATION_FIELDS:
             # Non-bullet continuation
-            if current_section == 'challenges':
-                data['challenges'].append(line)
-            elif current_section == 'goals':
-                data['goals'].append(line)
+            data[current_section].append(line)
 
     # Extract budget number if present
     if data['budget']:
-        budget_match = re.search(r'\$?([\d,]+)', data['budget'])
+        budget_match = _BUDGET_RE.search(data['budget'])
         if budget_match:
             data['budget_num'] = int(budget_match.group(1).replace(',', ''))
         else:
@@ -330,652 +613,258 @@ def parse_client_text(text):
     return data
 
 
-def build_proposal_with_ai_content(company, industry, location, budget, management_fee, ad_spend, today, ai_content, services):
-    """Build the full proposal HTML with AI-generated content matching local template design"""
+# Service keywords per channel, in the order detect_services() returns the flags.
+# The AI proposal also prices website work; the template fallback matches more synonyms.
+AI_SERVICE_KEYWORDS = (
+    ('google', 'ads', 'ppc'),
+    ('seo',),
+    ('social', 'facebook', 'instagram', 'linkedin'),
+    ('web', 'site'),
+)
+TEMPLATE_SERVICE_KEYWORDS = (
+    ('google', 'ads', 'ppc', 'sem'),
+    ('seo', 'organic', 'search engine opt'),
+    ('social', 'facebook', 'instagram', 'linkedin'),
+)
+
+
+def detect_services(services, channel_keywords):
+    """Return one flag per channel in channel_keywords, True if any service mentions it"""
+    return _detect_services(frozenset(s.lower() for s in services), channel_keywords)
+
+
+@lru_cache(maxsize=128)
+def _detect_services(services_key, channel_keywords):
+    """Cached detect_services() keyed on the lowercased, order-free service names"""
+    return tuple(
+        any(keyword in service for service in services_key for keyword in keywords)
+        for keywords in channel_keywords
+    )
 
-    # Determine service badges and build service price items
-    has_google_ads = any('google' in s.lower() or 'ads' in s.lower() or 'ppc' in s.lower() for s in services)
-    has_seo = any('seo' in s.lower() for s in services)
-    has_social = any('social' in s.lower() or 'facebook' in s.lower() or 'instagram' in s.lower() or 'linkedin' in s.lower() for s in services)
-    has_website = any('web' in s.lower() or 'site' in s.lower() for s in services)
 
-    # Build service-specific pricing items
-    price_items_html = ''
-    total_monthly = 0
+@lru_cache(maxsize=1024)
+def _thousands(n):
+    """Comma-grouped money figure (4500 -> 4,500), cached since budgets and fees repeat"""
+    return f'{n:,}'
+
+
+_STYLE_RE = re.compile(r'(<style[^>]*>)(.*?)(</style>)', re.S)
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+_CSS_PUNCT_RE = re.compile(r' ?([{};,>]) ?')
+_CSS_SPACE_RE = re.compile(r'\s+')
+# String literals and url() values, captured so re.split keeps them for copying verbatim
+_CSS_LITERAL_RE = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|url\([^)]*\))''')
+
+
+def _minify_css(css):
+    """Drop comments and redundant whitespace from a CSS block, leaving strings and url() values as written"""
+    parts = _CSS_LITERAL_RE.split(_CSS_COMMENT_RE.sub('', css))
+    # re.split alternates plain CSS and captured literals
+    for i in range(0, len(parts), 2):
+        text = _CSS_SPACE_RE.sub(' ', parts[i])
+        parts[i] = _CSS_PUNCT_RE.sub(r'\1', text).replace(': ', ':')
+    return ''.join(parts).strip()
+
+
+class MinifyingLoader(FileSystemLoader):
+    """FileSystemLoader that minifies inline <style> blocks when a template is loaded"""
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        source = _STYLE_RE.sub(lambda m: m.group(1) + _minify_css(m.group(2)) + m.group(3), source)
+        return source, filename, uptodate
+
+
+# Full proposal pages (AI content and template fallback), loaded and compiled once at
+# import. Their CSS is minified on load so the templates stay readable on disk.
+_PROPOSAL_ENV = Environment(
+    loader=MinifyingLoader(Path(__file__).parent / 'templates'),
+    autoescape=True,
+    auto_reload=False
+)
+_PROPOSAL_ENV.filters['thousands'] = _thousands
+_AI_PROPOSAL_TEMPLATE = _PROPOSAL_ENV.get_template('ai_proposal.html')
+_FALLBACK_PROPOSAL_TEMPLATE = _PROPOSAL_ENV.get_template('fallback_proposal.html')
+
+# Template events per streamed chunk - Jinja yields every static run and
+# expression separately, so group them before they hit the response
+PROPOSAL_STREAM_BUFFER = 32
+
+
+def _buffered_stream(template, context):
+    """Stream a proposal template in buffered chunks"""
+    stream = template.stream(context)
+    stream.enable_buffering(PROPOSAL_STREAM_BUFFER)
+    return stream
+
+
+# Proposal sections as (template key, start marker, end marker, shards needed). A
+# section runs up to the next section's marker, so it can only be extracted once
+# every AI shard up to the one holding that marker has arrived.
+AI_SECTIONS = (
+    ('executive_summary', 'EXECUTIVE SUMMARY', 'UNDERSTANDING YOUR BUSINESS', 1),
+    ('your_business', 'UNDERSTANDING YOUR BUSINESS', 'YOUR GOALS', 1),
+    ('goals', 'YOUR GOALS', 'OUR STRATEGY', 2),
+    ('strategy', 'OUR STRATEGY', 'IMPLEMENTATION', 2),
+    ('timeline', 'IMPLEMENTATION', 'INVESTMENT', 3),
+    ('investment', 'INVESTMENT', 'NEXT STEPS', 3),
+    ('next_steps', 'NEXT STEPS', None, 3),
+)
+_SHARDS_NEEDED = {key: needed for key, _, _, needed in AI_SECTIONS}
+
+
+@lru_cache(maxsize=32)
+def _ai_sections(ai_content):
+    """Split AI content into the proposal sections, keyed by template name.
+
+    Cached because repeated briefs reuse the same AI content from _ai_cache.
+    The returned dict is shared, so treat it as read-only.
+    """
+    # Lowercase the AI content once for the section lookups below
+    ai_lower = ai_content.lower() if ai_content else ''
+
+    markers = _index_sections(ai_content)
+    return {
+        key: extract_section(ai_content, start, end, ai_lower, markers)
+        for key, start, end, _ in AI_SECTIONS
+    }
 
-    if has_google_ads:
-        price_items_html += f'''
-                        <div class="price-item">
-                            <span class="label">Google Ads Management</span>
-                            <span class="amount">${management_fee:,}/month</span>
-                        </div>'''
-        total_monthly += management_fee
 
-    if has_seo:
-        seo_fee = 1100 if budget > 2000 else 799
-        price_items_html += f'''
-                        <div class="price-item">
-                            <span class="label">SEO Management</span>
-                            <span class="amount">${seo_fee:,}/month</span>
-                        </div>'''
-        total_monthly += seo_fee
+class PendingSections:
+    """AI proposal sections that become available as their shards complete.
 
-    if has_social:
-        social_fee = 800 if budget > 2000 else 599
-        price_items_html += f'''
-                        <div class="price-item">
-                            <span class="label">Social Media / LinkedIn Marketing</span>
-                            <span class="amount">${social_fee:,}/month</span>
-                        </div>'''
-        total_monthly += social_fee
+    The template looks sections up in page order, so a streamed page goes out
+    section by section while later shards are still being generated.
+    """
 
-    if has_website:
-        price_items_html += '''
-                        <div class="price-item">
-                            <span class="label">Website Design & Development</span>
-                            <span class="amount">$5,000 - $15,000</span>
-                        </div>'''
-
-    # Add ad spend
-    price_items_html += f'''
-                        <div class="price-item">
-                            <span class="label">Recommended Ad Spend</span>
-                            <span class="amount">${ad_spend:,}/month</span>
-                        </div>'''
-
-    # Total line
-    total_monthly += ad_spend
-    price_items_html += f'''
-                        <div class="price-item" style="border-top: 2px solid rgba(255,204,51,0.5); padding-top: 15px; margin-top: 15px; background: rgba(255,204,51,0.15); border-radius: 8px; padding: 15px;">
-                            <span class="label" style="font-size: 14pt;">Total Monthly Investment</span>
-                            <span class="amount" style="font-size: 18pt;">${total_monthly:,}/month</span>
-                        </div>'''
-
-    # Navigation menu items
-    nav_items = '''
-                    <li class="nav-menu-item"><a href="#executive-summary" class="nav-menu-link">Executive Summary</a></li>
-                    <li class="nav-menu-item"><a href="#your-business" class="nav-menu-link">Your Business</a></li>
-                    <li class="nav-menu-item"><a href="#goals" class="nav-menu-link">Goals</a></li>
-                    <li class="nav-menu-item"><a href="#strategy" class="nav-menu-link">Strategy</a></li>
-                    <li class="nav-menu-item"><a href="#timeline" class="nav-menu-link">Timeline</a></li>
-                    <li class="nav-menu-item"><a href="#investment" class="nav-menu-link">Investment</a></li>
-                    <li class="nav-menu-item"><a href="#about-mediaforce" class="nav-menu-link">About Us</a></li>
-                    <li class="nav-menu-item"><a href="#next-steps" class="nav-menu-link">Next Steps</a></li>'''
-
-    html = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{company} - Digital Marketing Proposal - Mediaforce</title>
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            font-size: 10pt;
-            line-height: 1.6;
-            color: #333;
-            background: #f5f5f5;
-            -webkit-font-smoothing: antialiased;
-        }}
-        html {{ scroll-behavior: smooth; }}
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background: white;
-            box-shadow: 0 0 20px rgba(0,0,0,0.1);
-            position: relative;
-        }}
-
-        /* Header */
-        .header {{
-            background: white;
-            color: #333;
-            padding: 25px 40px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            border-bottom: 3px solid #0e5881;
-        }}
-        .logo-container {{ flex: 1; }}
-        .header-info {{ text-align: right; }}
-        .header-info h1 {{ font-size: 18pt; margin-bottom: 5px; color: #0e5881; }}
-        .header-info p {{ font-size: 9pt; color: #666; }}
-
-        /* Sticky Navigation Menu */
-        .nav-menu {{
-            position: -webkit-sticky;
-            position: sticky;
-            top: 0;
-            left: 0;
-            right: 0;
-            width: 100%;
-            background: linear-gradient(135deg, #0e5881 0%, #0a4563 100%);
-            z-index: 9999;
-            box-shadow: 0 4px 20px rgba(0, 0, 0, 0.15);
-            border-bottom: 3px solid #ffcc33;
-        }}
-        .nav-container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            display: flex;
-            align-items: center;
-            padding: 0 20px;
-            overflow-x: auto;
-            scrollbar-width: none;
-        }}
-        .nav-container::-webkit-scrollbar {{ display: none; }}
-        .nav-menu-items {{
-            display: flex;
-            list-style: none;
-            margin: 0;
-            padding: 0;
-            gap: 5px;
-            flex-wrap: nowrap;
-            white-space: nowrap;
-        }}
-        .nav-menu-item {{ position: relative; }}
-        .nav-menu-link {{
-            display: block;
-            padding: 18px 20px;
-            color: white;
-            text-decoration: none;
-            font-size: 10pt;
-            font-weight: 600;
-            transition: all 0.3s ease;
-            position: relative;
-            border-bottom: 3px solid transparent;
-        }}
-        .nav-menu-link:hover {{
-            background: rgba(255, 255, 255, 0.1);
-            color: #ffcc33;
-            border-bottom-color: #ffcc33;
-        }}
-        .nav-menu-link.active {{
-            background: rgba(255, 255, 255, 0.15);
-            color: #ffcc33;
-            border-bottom-color: #ffcc33;
-        }}
-        .nav-menu-toggle {{
-            display: none;
-            background: rgba(255, 255, 255, 0.15);
-            border: 2px solid rgba(255, 255, 255, 0.4);
-            border-radius: 8px;
-            color: white;
-            font-size: 28px;
-            font-weight: bold;
-            cursor: pointer;
-            padding: 10px 15px;
-            margin-left: auto;
-            transition: all 0.3s ease;
-            line-height: 1;
-            min-width: 50px;
-            min-height: 50px;
-            align-items: center;
-            justify-content: center;
-            box-shadow: 0 2px 8px rgba(0, 0, 0, 0.2);
-        }}
-        .nav-menu-toggle:hover {{
-            background: rgba(255, 255, 255, 0.25);
-            border-color: rgba(255, 255, 255, 0.6);
-            transform: scale(1.05);
-        }}
-
-        /* Cover Section */
-        .cover {{
-            background: linear-gradient(135deg, #0e5881 0%, #0a4563 100%);
-            color: white;
-            padding: 50px 40px;
-            text-align: center;
-        }}
-        .cover h1 {{
-            font-size: 32pt;
-            margin-bottom: 15px;
-            font-weight: 700;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.2);
-        }}
-        .cover h2 {{
-            font-size: 18pt;
-            font-weight: 400;
-            margin-bottom: 20px;
-            color: white;
-            opacity: 0.95;
-        }}
-        .cover .meta {{
-            display: flex;
-            justify-content: center;
-            gap: 30px;
-            margin-top: 30px;
-            flex-wrap: wrap;
-        }}
-        .meta-item {{
-            background: rgba(255,255,255,0.15);
-            padding: 15px 25px;
-            border-radius: 10px;
-            backdrop-filter: blur(10px);
-            min-width: 180px;
-        }}
-        .meta-item strong {{
-            display: block;
-            font-size: 9pt;
-            text-transform: uppercase;
-            letter-spacing: 1.5px;
-            margin-bottom: 5px;
-            opacity: 0.9;
-        }}
-        .meta-item span {{ font-size: 16pt; font-weight: 700; }}
-
-        /* Content Sections */
-        .content {{ padding: 30px 40px; }}
-        .section {{ margin-bottom: 30px; page-break-inside: avoid; }}
-        h2 {{
-            color: #0e5881;
-            font-size: 18pt;
-            margin-bottom: 15px;
-            padding-bottom: 8px;
-            border-bottom: 3px solid #ffcc33;
-            page-break-after: avoid;
-        }}
-        h3 {{ color: #2d2d2d; font-size: 14pt; margin: 20px 0 10px 0; page-break-after: avoid; }}
-        h4 {{ color: #444; font-size: 12pt; margin: 15px 0 8px 0; page-break-after: avoid; }}
-        p {{ color: #555; margin-bottom: 10px; line-height: 1.7; }}
-        ul, ol {{ margin: 10px 0 10px 30px; color: #555; }}
-        li {{ margin-bottom: 6px; line-height: 1.6; color: inherit; }}
-
-        /* Highlight Boxes */
-        .info-box {{
-            background: #e8f4f8;
-            border-left: 4px solid #0e5881;
-            padding: 15px 20px;
-            margin: 20px 0;
-            border-radius: 0 8px 8px 0;
-            page-break-inside: avoid;
-        }}
-        .success-box {{
-            background: #E8F5E9;
-            border-left: 4px solid #4CAF50;
-            padding: 15px 20px;
-            margin: 20px 0;
-            border-radius: 0 8px 8px 0;
-            page-break-inside: avoid;
-        }}
-        .warning-box {{
-            background: #FFF3E0;
-            border-left: 4px solid #FF9800;
-            padding: 15px 20px;
-            margin: 20px 0;
-            border-radius: 0 8px 8px 0;
-            page-break-inside: avoid;
-        }}
-
-        /* Price Box */
-        .price-box {{
-            background: linear-gradient(135deg, #0e5881 0%, #0a4563 100%);
-            color: white;
-            padding: 25px;
-            border-radius: 12px;
-            margin: 25px 0;
-            box-shadow: 0 10px 30px rgba(14,88,129,0.3);
-            page-break-inside: avoid;
-            border: 3px solid #ffcc33;
-        }}
-        .price-box h3 {{ color: white; margin-top: 0; font-size: 16pt; margin-bottom: 15px; }}
-        .price-item {{
-            background: rgba(255,255,255,0.1);
-            padding: 15px 20px;
-            margin: 10px 0;
-            border-radius: 8px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }}
-        .price-item .label {{ font-size: 12pt; font-weight: 500; color: white; }}
-        .price-item .amount {{ font-size: 16pt; font-weight: 700; color: white; }}
-        .price-box p, .price-box ul, .price-box ol, .price-box li, .price-box h4 {{ color: white; }}
-
-        /* Cards */
-        .card-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(320px, 1fr));
-            gap: 20px;
-            margin: 20px 0;
-        }}
-        .card {{
-            background: #f9f9f9;
-            border-left: 4px solid #ffcc33;
-            padding: 20px;
-            border-radius: 8px;
-            transition: transform 0.3s, box-shadow 0.3s;
-            page-break-inside: avoid;
-        }}
-        .card:hover {{ transform: translateY(-5px); box-shadow: 0 10px 25px rgba(0,0,0,0.1); }}
-        .card h4 {{ color: #0e5881; margin-top: 0; font-size: 13pt; }}
-
-        /* Checklist */
-        .checklist {{ list-style: none; padding-left: 0; }}
-        .checklist li {{ padding-left: 30px; position: relative; margin-bottom: 8px; }}
-        .checklist li:before {{
-            content: "\\2713";
-            position: absolute;
-            left: 0;
-            color: #4CAF50;
-            font-weight: bold;
-            font-size: 14pt;
-        }}
-
-        /* Footer */
-        .footer {{
-            background: #1a1a1a;
-            color: white;
-            padding: 30px 40px;
-            text-align: center;
-        }}
-        .footer p {{ color: #ccc; margin: 5px 0; font-size: 9pt; }}
-        .footer strong {{ color: #ffcc33; }}
-
-        /* Responsive Design */
-        @media (max-width: 768px) {{
-            .nav-menu {{
-                position: -webkit-sticky !important;
-                position: sticky !important;
-                top: 0 !important;
-                z-index: 9999 !important;
-            }}
-            .nav-container {{
-                flex-wrap: wrap;
-                position: relative;
-                min-height: 65px;
-                padding: 10px 20px;
-            }}
-            .nav-menu-items {{
-                flex-direction: column;
-                width: 100%;
-                max-height: 0;
-                overflow: hidden;
-                transition: max-height 0.4s ease-in-out;
-            }}
-            .nav-menu-items.active {{
-                max-height: 800px;
-                padding-bottom: 10px;
-            }}
-            .nav-menu-toggle {{
-                display: flex !important;
-                position: fixed;
-                right: 15px;
-                top: 10px;
-                z-index: 10001 !important;
-                width: 55px;
-                height: 55px;
-                background: rgba(255, 204, 51, 0.3);
-                border: 3px solid #ffcc33;
-            }}
-            .nav-menu-link {{
-                border-bottom: 1px solid rgba(255, 255, 255, 0.1);
-                border-left: 3px solid transparent;
-                padding: 15px 20px;
-            }}
-            .header {{ flex-direction: column; text-align: center; }}
-            .header-info {{ text-align: center; margin-top: 15px; }}
-            .content {{ padding: 20px; }}
-            .cover h1 {{ font-size: 24pt; }}
-            .card-grid {{ grid-template-columns: 1fr !important; }}
-            body {{ font-size: 11pt; }}
-            .meta {{ flex-direction: column; gap: 15px !important; }}
-            .meta-item {{ min-width: auto; width: 100%; }}
-        }}
-
-        /* Print Styles */
-        @media print {{
-            body {{ background: white; }}
-            .container {{ box-shadow: none; }}
-            .nav-menu {{ display: none; }}
-            .section, .card, .info-box, .success-box, .warning-box, .price-box {{ page-break-inside: avoid; }}
-            h2, h3, h4 {{ page-break-after: avoid; }}
-        }}
-    </style>
-    <script>
-        window.addEventListener('DOMContentLoaded', () => {{
-            const navToggle = document.getElementById('navToggle');
-            const navMenu = document.getElementById('navMenu');
-
-            if (navToggle) {{
-                navToggle.addEventListener('click', (e) => {{
-                    e.stopPropagation();
-                    navMenu.classList.toggle('active');
-                }});
-                document.addEventListener('click', (e) => {{
-                    if (!navToggle.contains(e.target) && !navMenu.contains(e.target)) {{
-                        navMenu.classList.remove('active');
-                    }}
-                }});
-            }}
-
-            document.querySelectorAll('.nav-menu-link').forEach(link => {{
-                link.addEventListener('click', function(e) {{
-                    e.preventDefault();
-                    const targetId = this.getAttribute('href');
-                    const targetSection = document.querySelector(targetId);
-                    if (targetSection) {{
-                        const navHeight = document.querySelector('.nav-menu').offsetHeight;
-                        const targetPosition = targetSection.offsetTop - navHeight;
-                        window.scrollTo({{ top: targetPosition, behavior: 'smooth' }});
-                        navMenu.classList.remove('active');
-                    }}
-                }});
-            }});
-
-            const sections = document.querySelectorAll('.section');
-            const navLinks = document.querySelectorAll('.nav-menu-link');
-            function highlightNavigation() {{
-                let current = '';
-                sections.forEach(section => {{
-                    const sectionTop = section.offsetTop;
-                    if (window.pageYOffset >= sectionTop - 200) {{
-                        current = section.getAttribute('id');
-                    }}
-                }});
-                navLinks.forEach(link => {{
-                    link.classList.remove('active');
-                    if (link.getAttribute('href') === `#${{current}}`) {{
-                        link.classList.add('active');
-                    }}
-                }});
-            }}
-            window.addEventListener('scroll', highlightNavigation);
-            highlightNavigation();
-        }});
-    </script>
-</head>
-<body>
-    <div class="container">
-        <!-- Header with Logo -->
-        <div class="header">
-            <div class="logo-container">
-                <img src="https://mediaforce.ca/wp-content/uploads/2025/10/mf-logo2.png" alt="Mediaforce" style="height: 60px; width: auto;">
-            </div>
-            <div class="header-info">
-                <h1>Marketing Proposal</h1>
-                <p>Prepared for {company}</p>
-                <p>{today}</p>
-            </div>
-        </div>
+    def __init__(self, futures):
+        self.futures = futures
+        # Report each failed shard once, not once per section that depends on it
+        for future in futures:
+            future.add_done_callback(self._report_failure)
 
-        <!-- Navigation Menu -->
-        <nav class="nav-menu">
-            <div class="nav-container">
-                <ul class="nav-menu-items" id="navMenu">
-                    {nav_items}
-                </ul>
-                <button class="nav-menu-toggle" id="navToggle">&#9776;</button>
-            </div>
-        </nav>
-
-        <!-- Cover Section -->
-        <div class="cover">
-            <h1>{company}</h1>
-            <h2>Strategic Digital Marketing Proposal</h2>
-            <p style="font-size: 12pt; margin-top: 20px; color: white;">Driving Lead Generation & Customer Acquisition</p>
-
-            <div class="meta">
-                <div class="meta-item">
-                    <strong>Location</strong>
-                    <span>{location if location else 'Canada'}</span>
-                </div>
-                <div class="meta-item">
-                    <strong>Services</strong>
-                    <span>{len(services)}-Channel Strategy</span>
-                </div>
-                <div class="meta-item">
-                    <strong>Monthly Budget</strong>
-                    <span>${budget:,}/mo</span>
-                </div>
-            </div>
-        </div>
+    @staticmethod
+    def _report_failure(future):
+        if future.exception() is not None:
+            print(f"AI generation error: {future.exception()}")
 
-        <!-- Content -->
-        <div class="content">
-
-            <!-- Executive Summary -->
-            <section id="executive-summary" class="section">
-                <h2>&#128202; Executive Summary</h2>
-                {extract_section(ai_content, 'EXECUTIVE SUMMARY', 'UNDERSTANDING YOUR BUSINESS')}
-            </section>
-
-            <!-- Understanding Your Business -->
-            <section id="your-business" class="section">
-                <h2>&#127970; Understanding Your Business</h2>
-                {extract_section(ai_content, 'UNDERSTANDING YOUR BUSINESS', 'YOUR GOALS')}
-            </section>
-
-            <!-- Goals & Vision -->
-            <section id="goals" class="section">
-                <h2>&#127919; Your Goals & Vision for Success</h2>
-                {extract_section(ai_content, 'YOUR GOALS', 'OUR STRATEGY')}
-            </section>
-
-            <!-- Strategy -->
-            <section id="strategy" class="section">
-                <h2>&#128640; Our Strategy & Approach</h2>
-                {extract_section(ai_content, 'OUR STRATEGY', 'IMPLEMENTATION')}
-            </section>
-
-            <!-- Timeline -->
-            <section id="timeline" class="section">
-                <h2>&#128197; Implementation Timeline</h2>
-                {extract_section(ai_content, 'IMPLEMENTATION', 'INVESTMENT')}
-            </section>
-
-            <!-- Investment -->
-            <section id="investment" class="section">
-                <h2>&#128176; Investment & Pricing</h2>
-
-                <div class="price-box">
-                    <h3>&#127919; Your Monthly Investment</h3>
-                    <div style="background: rgba(255,255,255,0.1); padding: 15px; border-radius: 8px; margin-bottom: 20px;">
-                        {price_items_html}
-                    </div>
-                </div>
-
-                <div style="color: #333;">
-                    {extract_section(ai_content, 'INVESTMENT', 'NEXT STEPS')}
-                </div>
-            </section>
-
-            <!-- About Mediaforce -->
-            <section id="about-mediaforce" class="section">
-                <h2>&#127970; About Mediaforce</h2>
-
-                <div class="success-box">
-                    <h3 style="margin-top: 0;">Your Digital Growth Partner</h3>
-                    <p>Mediaforce is a full-service digital marketing agency with deep expertise in website development, lead generation, and growth marketing for B2B professional services firms.</p>
-                </div>
-
-                <h3>Why Choose Mediaforce?</h3>
-                <ul class="checklist">
-                    <li><strong>Proven Track Record:</strong> Years of experience delivering results for Canadian businesses</li>
-                    <li><strong>Data-Driven Approach:</strong> Every decision backed by analytics and performance data</li>
-                    <li><strong>Full-Service Capability:</strong> From strategy to execution, all under one roof</li>
-                    <li><strong>Dedicated Team:</strong> Direct access to senior strategists, not junior account managers</li>
-                    <li><strong>Transparent Reporting:</strong> Clear, actionable insights delivered monthly</li>
-                </ul>
-
-                <!-- Client Referral - Augusto Bresolin -->
-                <h3>Client Reference</h3>
-                <div class="info-box">
-                    <h4 style="margin-top: 0;">PNL Communications - Satisfied Client</h4>
-                    <p>We've worked with PNL Communications on their digital marketing and website development. Feel free to reach out to learn about their experience working with Mediaforce.</p>
-
-                    <div style="background: white; border-radius: 8px; border-left: 4px solid #0e5881; padding: 20px; margin-top: 20px;">
-                        <div style="display: flex; align-items: center; gap: 15px; margin-bottom: 15px;">
-                            <img src="https://mediaforce.ca/wp-content/uploads/2025/11/1751996871221.jpeg" alt="Augusto Bresolin" style="width: 100px; height: 100px; border-radius: 50%; object-fit: cover; box-shadow: 0 4px 12px rgba(0,0,0,0.15);">
-                            <div>
-                                <p style="margin: 0; font-weight: 600; color: #333;">Augusto Bresolin</p>
-                                <p style="margin: 5px 0; color: #666; font-size: 10pt;">He/Him</p>
-                                <p style="margin: 0; color: #666; font-size: 10pt;">Project Process Analyst, PNL Communications</p>
-                            </div>
-                        </div>
-                        <p style="margin: 10px 0; color: #333;"><strong>&#128222;</strong> (902) 431-3131</p>
-                        <p style="margin: 10px 0; color: #333;"><strong>&#128231;</strong> augusto@pnl.ca</p>
-                        <p style="margin: 10px 0; color: #333;"><strong>&#127760;</strong> www.pnl.ca</p>
-                    </div>
-                </div>
-
-                <!-- Contact Information - Joe Bongiorno -->
-                <h3>Contact Information</h3>
-                <div class="info-box" style="text-align: center;">
-                    <p><strong>We're here to answer any questions about this proposal, our approach, or how we'll achieve your goals.</strong></p>
-                    <div style="margin: 20px 0;">
-                        <img src="https://mediaforce.ca/wp-content/uploads/2025/11/Joe-Bongiorno.png" alt="Joe Bongiorno" style="width: 120px; height: auto; border-radius: 50%; box-shadow: 0 4px 12px rgba(0,0,0,0.15);">
-                    </div>
-                    <p style="margin-top: 15px; color: #333;"><strong>Joe Bongiorno</strong><br>
-                    Digital Marketing Strategist</p>
-                    <p style="margin-top: 10px; color: #333;">&#128231; Email: <strong>jbon@mediaforce.ca</strong></p>
-                    <p style="color: #333;">&#128222; Phone: <strong>613-265-2120</strong></p>
-                    <p style="color: #333;">&#127760; Website: <strong>www.mediaforce.ca</strong></p>
-                    <p style="margin-top: 15px; color: #333;"><strong>Response Time:</strong> Same business day</p>
-                </div>
-            </section>
-
-            <!-- Next Steps -->
-            <section id="next-steps" class="section">
-                <h2>&#9989; Next Steps</h2>
-                {extract_section(ai_content, 'NEXT STEPS', None)}
-
-                <div class="success-box" style="margin-top: 30px;">
-                    <h3 style="margin-top: 0;">Let's Build Your Lead Generation Engine</h3>
-                    <p style="color: #333;">With the right digital marketing strategy, {company} can establish itself as a leader in your market. We're committed to delivering reliable, measurable results.</p>
-                    <p style="margin-top: 15px; font-size: 12pt; color: #333;"><strong>Ready to get started? Let's schedule your kickoff call.</strong></p>
-                </div>
-            </section>
+    def __getitem__(self, key):
+        try:
+            content = '\n'.join(future.result() for future in self.futures[:_SHARDS_NEEDED[key]])
+        except Exception:
+            return '<p>Section content not available.</p>'
+        return _ai_sections(content)[key]
 
-        </div>
 
-        <!-- Footer Logos -->
-        <div style="text-align: center; margin: 40px 0 20px 0;">
-            <img src="https://mediaforce.ca/wp-content/uploads/2025/11/footer-logos.png" alt="Partner Platforms" style="max-width: 100%; height: auto;">
-        </div>
+def build_proposal_with_ai_content(company, industry, location, budget, management_fee, ad_spend, today, ai_content, services, stream=False):
+    """Build the full proposal HTML with AI-generated content matching local template design.
 
-        <!-- Footer -->
-        <div class="footer">
-            <p><strong>MEDIAFORCE</strong> - Digital Marketing Excellence</p>
-            <p>This proposal is valid for 30 days from the date of issue.</p>
-            <p>&copy; 2025 Mediaforce. All rights reserved.</p>
-        </div>
-    </div>
-</body>
-</html>'''
+    With stream=True, returns an iterator of HTML chunks instead of a string.
+    ai_content may also be PendingSections, in which case sections are
+    streamed as their shards arrive.
+    """
 
-    return html
+    # Determine which service price items to show
+    has_google_ads, has_seo, has_social, has_website = detect_services(services, AI_SERVICE_KEYWORDS)
 
+    # Service fees and monthly total for the pricing rows in the template
+    seo_fee = 1100 if budget > 2000 else 799
+    social_fee = 800 if budget > 2000 else 599
+    total_monthly = ad_spend
+    if has_google_ads:
+        total_monthly += management_fee
+    if has_seo:
+        total_monthly += seo_fee
+    if has_social:
+        total_monthly += social_fee
 
-def extract_section(content, start_marker, end_marker):
-    """Extract a section from AI-generated content between markers"""
+    if isinstance(ai_content, PendingSections):
+        sections = ai_content
+    else:
+        sections = _ai_sections(ai_content)
+
+    context = {
+        'company': company,
+        'location': location,
+        'budget': budget,
+        'today': today,
+        'services': services,
+        'has_google_ads': has_google_ads,
+        'has_seo': has_seo,
+        'has_social': has_social,
+        'has_website': has_website,
+        'management_fee': management_fee,
+        'seo_fee': seo_fee,
+        'social_fee': social_fee,
+        'ad_spend': ad_spend,
+        'total_monthly': total_monthly,
+        'sections': sections
+    }
+    if stream:
+        if sections is ai_content:
+            # Unbuffered, so each section is sent as soon as its shards arrive
+            return _AI_PROPOSAL_TEMPLATE.generate(context)
+        return _buffered_stream(_AI_PROPOSAL_TEMPLATE, context)
+    return _AI_PROPOSAL_TEMPLATE.render(context)
+
+
+def _strip_html_comments(html):
+    """Remove <!-- ... --> comments, leaving an unterminated comment in place"""
+    parts = []
+    pos = 0
+    while True:
+        start = html.find('<!--', pos)
+        if start == -1:
+            break
+        end = html.find('-->', start + 4)
+        if end == -1:
+            break
+        parts.append(html[pos:start])
+        pos = end + 3
+    if not parts:
+        return html
+    parts.append(html[pos:])
+    return ''.join(parts)
+
+
+_SECTION_PREFIX = '<!-- SECTION: '
+
+
+def _index_sections(content):
+    """Return the offsets of every '<!-- SECTION: ' marker in content."""
+    offsets = []
+    idx = content.find(_SECTION_PREFIX)
+    while idx != -1:
+        offsets.append(idx)
+        idx = content.find(_SECTION_PREFIX, idx + len(_SECTION_PREFIX))
+    return offsets
+
+
+def _find_section(content, markers, name, start=0):
+    """Like content.find('<!-- SECTION: ' + name, start), using indexed marker offsets."""
+    for offset in markers:
+        if offset >= start and content.startswith(name, offset + len(_SECTION_PREFIX)):
+            return offset
+    return -1
+
+
+def extract_section(content, start_marker, end_marker, content_lower=None, markers=None):
+    """Extract a section from AI-generated content between markers.
+
+    Pass content_lower (content.lower()) and markers (_index_sections(content))
+    when extracting several sections from the same content so it is only scanned once.
+    """
     if not content:
         return '<p>Content generation in progress...</p>'
 
+    if content_lower is None:
+        content_lower = content.lower()
+    if markers is None:
+        markers = _index_sections(content)
+
     # Try to find section by comment markers
     start_pattern = f'<!-- SECTION: {start_marker}'
-    start_idx = content.find(start_pattern)
+    start_idx = _find_section(content, markers, start_marker)
 
     if start_idx == -1:
         # Try alternate patterns
@@ -985,20 +874,19 @@ def extract_section(content, start_marker, end_marker):
     if start_idx == -1:
         # Try finding by section header
         start_pattern = start_marker.replace('_', ' ').title()
-        start_idx = content.lower().find(start_marker.lower().replace('_', ' '))
+        start_idx = content_lower.find(start_marker.lower().replace('_', ' '))
 
     if start_idx == -1:
         return '<p>Section content not available.</p>'
 
     # Find end of section
     if end_marker:
-        end_pattern = f'<!-- SECTION: {end_marker}'
-        end_idx = content.find(end_pattern, start_idx + len(start_pattern))
+        end_idx = _find_section(content, markers, end_marker, start_idx + len(start_pattern))
         if end_idx == -1:
             end_pattern = f'<!-- {end_marker}'
             end_idx = content.find(end_pattern, start_idx + len(start_pattern))
         if end_idx == -1:
-            end_idx = content.lower().find(end_marker.lower().replace('_', ' '), start_idx + 50)
+            end_idx = content_lower.find(end_marker.lower().replace('_', ' '), start_idx + 50)
     else:
         end_idx = len(content)
 
@@ -1009,38 +897,63 @@ def extract_section(content, start_marker, end_marker):
     section = content[start_idx:end_idx]
 
     # Remove the comment marker if present
-    section = re.sub(r'<!--[^>]*-->', '', section)
+    section = _strip_html_comments(section)
     section = section.strip()
 
     # If section starts with a header matching the section name, remove it (we add our own h2)
-    section = re.sub(r'^<h[23][^>]*>[^<]*</h[23]>\s*', '', section, flags=re.IGNORECASE)
+    if section[:3].lower() in ('<h2', '<h3'):
+        section = _LEADING_HEADER_RE.sub('', section, count=1)
 
     return section if section else '<p>Section content not available.</p>'
 
 
-def generate_ai_proposal(text, data):
-    """Use Claude API to generate rich proposal content"""
-    if not HAS_ANTHROPIC:
-        return None
+# Proposal sections requested from Claude, split into shards that are generated
+# concurrently. Shards are concatenated in order, so section markers stay sequential.
+AI_SECTION_SHARDS = (
+    """1. EXECUTIVE SUMMARY (100-150 words)
+- Opening paragraph positioning the client
+- Info-box with "This Proposal Delivers:" containing 5-6 bullet points of outcomes
 
-    api_key = os.environ.get('ANTHROPIC_API_KEY')
-    if not api_key:
-        return None
+2. UNDERSTANDING YOUR BUSINESS (200-250 words)
+- Their current situation and challenges
+- Card grid with 3 challenge cards
+- Target audience description
 
-    client = Anthropic(api_key=api_key)
+3. YOUR GOALS & VISION (150-200 words)
+- Two cards: Short-term goals (3-6 months) and Long-term vision (1-3 years)
+- Each with 4-5 specific bullet points""",
+    """4. OUR STRATEGY & APPROACH (300-400 words)
+- Platform recommendation (why Google Ads/SEO/Social works for them)
+- Card grid with service-specific tactics:
+  - If Google Ads: keyword strategy, ad types, targeting approach
+  - If SEO: technical SEO, content strategy, local SEO
+  - If Social: platform selection, audience targeting, creative approach
+- Campaign structure overview
 
-    company = data['company'] or 'the client'
-    industry = data['industry'] or 'their industry'
-    location = data['location'] or ''
-    challenges = data['challenges'] or ['increase online visibility', 'generate more leads']
-    goals = data['goals'] or ['grow website traffic', 'increase qualified leads']
-    budget = data['budget_num']
-    services = data['services']
+5. IMPLEMENTATION TIMELINE (100-150 words)
+- 4 timeline items: Week 1, Week 2, Week 3, Ongoing
+- Each with title and 2-3 bullet points""",
+    """6. INVESTMENT & ROI (150-200 words)
+Based on ${budget:,}/month total:
+- Management fee: ${management_fee}/month
+- Ad spend: ${ad_spend}/month
+- What's included (5-6 bullet points)
+- Why this investment makes sense
 
-    # Build services string
-    services_str = ', '.join(services) if services else 'Google Ads and SEO'
+7. NEXT STEPS (100 words)
+- 3 steps to get started
+- Contact call-to-action""",
+)
+AI_SHARD_MAX_TOKENS = 3000
+
+# Generated content per client brief - re-previewing the same brief skips the API call
+AI_CACHE_SIZE = 128
+AI_CACHE_TTL = 24 * 60 * 60
+_ai_cache = LRUCache(AI_CACHE_SIZE, ttl=AI_CACHE_TTL)
 
-    system_message = """You are an expert digital marketing strategist writing proposals for Mediaforce, a Canadian digital marketing agency. Generate professional, persuasive, detailed proposal content.
+
+# System prompt shared by every shard
+AI_SYSTEM_MESSAGE = """You are an expert digital marketing strategist writing proposals for Mediaforce, a Canadian digital marketing agency. Generate professional, persuasive, detailed proposal content.
 
 Your writing style:
 - Confident and authoritative but not arrogant
@@ -1052,7 +965,76 @@ Your writing style:
 Output clean HTML with these allowed tags only: p, h3, h4, ul, li, strong, em, div
 Use these CSS classes: info-box, card-grid, card, success-box, warning-box"""
 
-    prompt = f"""Generate a complete digital marketing proposal for:
+# Resolved once at startup; without a key the template fallback is used
+ANTHROPIC_API_KEY = os.environ.get('ANTHROPIC_API_KEY')
+
+
+@lru_cache(maxsize=1)
+def get_anthropic():
+    """Create the Anthropic client on first use and share it, so connections are reused"""
+    return Anthropic(api_key=ANTHROPIC_API_KEY)
+
+
+def _submit_ai_shards(prompts):
+    """Send all shard prompts concurrently, returning one future per shard in order"""
+    client = get_anthropic()
+
+    def create(prompt):
+        response = client.messages.create(
+            model="claude-sonnet-4-5-20250929",
+            max_tokens=AI_SHARD_MAX_TOKENS,
+            system=AI_SYSTEM_MESSAGE,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return response.content[0].text
+
+    pool = ThreadPoolExecutor(max_workers=len(prompts))
+    futures = [pool.submit(create, prompt) for prompt in prompts]
+    pool.shutdown(wait=False)
+    return futures
+
+
+def _cache_when_done(cache_key, futures):
+    """Cache the joined shard content once every shard has completed successfully"""
+    def done(_):
+        if all(future.done() and not future.exception() for future in futures):
+            _ai_cache.set(cache_key, '\n'.join(future.result() for future in futures))
+
+    for future in futures:
+        future.add_done_callback(done)
+
+
+def generate_ai_proposal(text, data, wait=True):
+    """Use Claude API to generate rich proposal content.
+
+    With wait=False, returns PendingSections once the first shard has arrived
+    (a failure there still falls back to the template) instead of waiting for all.
+    """
+    if not HAS_ANTHROPIC or not ANTHROPIC_API_KEY:
+        return None
+
+    # The parsed data is derived from the text, so the text alone identifies the request
+    cache_key = hashlib.sha256(text.encode()).digest()
+    cached = _ai_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    company = data['company'] or 'the client'
+    industry = data['industry'] or 'their industry'
+    location = data['location'] or ''
+    challenges = data['challenges'] or ['increase online visibility', 'generate more leads']
+    goals = data['goals'] or ['grow website traffic', 'increase qualified leads']
+    budget = data['budget_num']
+    services = data['services']
+
+    # Build services string
+    services_str = ', '.join(services) if services else 'Google Ads and SEO'
+
+    # Bullet lists for the prompt (both lists always have at least one item)
+    challenges_list = '\n- '.join(challenges)
+    goals_list = '\n- '.join(goals)
+
+    brief = f"""Generate part of a digital marketing proposal for:
 
 **Client:** {company}
 **Industry:** {industry}
@@ -1061,81 +1043,62 @@ Use these CSS classes: info-box, card-grid, card, success-box, warning-box"""
 **Services Needed:** {services_str}
 
 **Their Challenges:**
-{chr(10).join('- ' + c for c in challenges)}
+- {challenges_list}
 
 **Their Goals:**
-{chr(10).join('- ' + g for g in goals)}
+- {goals_list}
 
 **Original Client Brief:**
 {text}
 
-Generate the following sections with rich, specific, persuasive content (output raw HTML):
-
-1. EXECUTIVE SUMMARY (100-150 words)
-- Opening paragraph positioning the client
-- Info-box with "This Proposal Delivers:" containing 5-6 bullet points of outcomes
-
-2. UNDERSTANDING YOUR BUSINESS (200-250 words)
-- Their current situation and challenges
-- Card grid with 3 challenge cards
-- Target audience description
-
-3. YOUR GOALS & VISION (150-200 words)
-- Two cards: Short-term goals (3-6 months) and Long-term vision (1-3 years)
-- Each with 4-5 specific bullet points
+Generate ONLY the following sections with rich, specific, persuasive content (output raw HTML):
 
-4. OUR STRATEGY & APPROACH (300-400 words)
-- Platform recommendation (why Google Ads/SEO/Social works for them)
-- Card grid with service-specific tactics:
-  - If Google Ads: keyword strategy, ad types, targeting approach
-  - If SEO: technical SEO, content strategy, local SEO
-  - If Social: platform selection, audience targeting, creative approach
-- Campaign structure overview
-
-5. IMPLEMENTATION TIMELINE (100-150 words)
-- 4 timeline items: Week 1, Week 2, Week 3, Ongoing
-- Each with title and 2-3 bullet points
-
-6. INVESTMENT & ROI (150-200 words)
-Based on ${budget:,}/month total:
-- Management fee: ${min(899, budget//3)}/month
-- Ad spend: ${budget - min(899, budget//3)}/month
-- What's included (5-6 bullet points)
-- Why this investment makes sense
+"""
 
-7. NEXT STEPS (100 words)
-- 3 steps to get started
-- Contact call-to-action
+    instructions = f"""
 
 Output each section with a clear HTML comment like <!-- SECTION: EXECUTIVE SUMMARY --> before each section.
 Make the content specific to {company} and {industry}. Reference their actual challenges and goals.
 Be persuasive about why Mediaforce is the right partner."""
 
+    management_fee = min(899, budget // 3)
+    prompts = [
+        brief + shard.format(budget=budget, management_fee=management_fee, ad_spend=budget - management_fee) + instructions
+        for shard in AI_SECTION_SHARDS
+    ]
+
+    futures = _submit_ai_shards(prompts)
     try:
-        response = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=8000,
-            system=system_message,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        if not wait:
+            futures[0].result()
+            _cache_when_done(cache_key, futures)
+            return PendingSections(futures)
+        content = '\n'.join(future.result() for future in futures)
     except Exception as e:
         print(f"AI generation error: {e}")
         return None
 
+    _ai_cache.set(cache_key, content)
+    return content
+
+
+def generate_proposal_from_text(text, stream=False, progressive=False):
+    """Generate full BMW-style proposal HTML from parsed text.
 
-def generate_proposal_from_text(text):
-    """Generate full BMW-style proposal HTML from parsed text"""
+    With stream=True, returns an iterable of HTML chunks instead of a string.
+    progressive=True also streams, sending AI sections as their shards arrive
+    rather than waiting for all of them; a section whose shard fails is then
+    marked unavailable instead of the whole page falling back to the template.
+    """
     data = parse_client_text(text)
+    stream = stream or progressive
 
     # Try AI generation first
-    ai_content = generate_ai_proposal(text, data)
+    ai_content = generate_ai_proposal(text, data, wait=not progressive)
 
     company = data['company'] or 'Your Company'
     industry = data['industry'] or 'Your Industry'
     location = data['location'] or ''
-    challenges = data['challenges'] or ['Increase online visibility', 'Generate more leads', 'Improve conversion rates']
-    goals = data['goals'] or ['Grow website traffic', 'Increase qualified leads', 'Boost revenue']
     budget = data['budget_num']
     services = data['services']
 
@@ -1143,437 +1106,96 @@ def generate_proposal_from_text(text):
     management_fee = min(899, budget // 3) if budget > 1500 else 499
     ad_spend = budget - management_fee
 
-    today = datetime.now().strftime('%B %d, %Y')
+    today = _today_str('%B %d, %Y')
 
     # If AI content was generated, use it
     if ai_content:
-        return build_proposal_with_ai_content(company, industry, location, budget, management_fee, ad_spend, today, ai_content, services)
+        return build_proposal_with_ai_content(company, industry, location, budget, management_fee, ad_spend, today, ai_content, services, stream)
 
     # Fallback to template-based generation
-    data['company'] = company
-    data['industry'] = industry
-    data['location'] = location
-    data['challenges'] = challenges
-    data['goals'] = goals
-    data['budget_num'] = budget
-    data['services'] = services
-
-    company = data['company'] or 'Your Company'
-    industry = data['industry'] or 'Your Industry'
-    location = data['location'] or ''
     challenges = data['challenges'] or ['Increase online visibility', 'Generate more leads', 'Improve conversion rates']
     goals = data['goals'] or ['Grow website traffic', 'Increase qualified leads', 'Boost revenue']
-    budget = data['budget_num']
-    services = data['services']
 
-    # Calculate pricing
+    # The template has its own pricing tiers
     management_fee = 899 if budget < 3000 else 1200 if budget < 5000 else 1500
     ad_spend = budget - management_fee if budget > management_fee else 1500
 
     # Determine which services sections to show
-    has_google_ads = any('google' in s.lower() or 'ads' in s.lower() or 'ppc' in s.lower() or 'sem' in s.lower() for s in services)
-    has_seo = any('seo' in s.lower() or 'organic' in s.lower() or 'search engine opt' in s.lower() for s in services)
-    has_social = any('social' in s.lower() or 'facebook' in s.lower() or 'instagram' in s.lower() or 'linkedin' in s.lower() for s in services)
+    has_google_ads, has_seo, has_social = detect_services(services, TEMPLATE_SERVICE_KEYWORDS)
 
     if not has_google_ads and not has_seo and not has_social:
         has_google_ads = True
         has_seo = True
 
-    today = datetime.now().strftime('%B %d, %Y')
-
-    html = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Digital Marketing Proposal - {company}</title>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap" rel="stylesheet">
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{
-            font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-            font-size: 11pt;
-            line-height: 1.6;
-            color: #333;
-            background: #fff;
-        }}
-        .container {{ max-width: 900px; margin: 0 auto; padding: 0; }}
-
-        /* Header */
-        .header {{
-            background: linear-gradient(135deg, #0e5881 0%, #0a4563 100%);
-            color: white;
-            padding: 60px 40px;
-            text-align: center;
-        }}
-        .header img {{ height: 50px; margin-bottom: 20px; }}
-        .header h1 {{ font-size: 2.2rem; font-weight: 600; margin-bottom: 10px; }}
-        .header .subtitle {{ font-size: 1.1rem; opacity: 0.9; }}
-        .header .date {{ margin-top: 20px; font-size: 0.9rem; opacity: 0.8; }}
-
-        /* Sections */
-        .section {{ padding: 40px; }}
-        .section-alt {{ background: #f8f9fa; }}
-        .section-blue {{ background: #e8f4fc; }}
-        .section h2 {{
-            color: #0e5881;
-            font-size: 1.4rem;
-            margin-bottom: 20px;
-            padding-bottom: 10px;
-            border-bottom: 3px solid #ffcc33;
-        }}
-
-        /* Cards */
-        .card-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 20px; margin-top: 20px; }}
-        .card {{
-            background: white;
-            border-radius: 8px;
-            padding: 25px;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-        }}
-        .card h3 {{ color: #0e5881; font-size: 1.1rem; margin-bottom: 12px; }}
-        .card ul {{ padding-left: 20px; }}
-        .card li {{ margin: 8px 0; }}
-
-        /* Info Box */
-        .info-box {{
-            background: #e8f4fc;
-            border-left: 4px solid #0e5881;
-            padding: 20px;
-            border-radius: 0 8px 8px 0;
-            margin: 20px 0;
-        }}
-
-        /* Price Box */
-        .price-section {{ background: #0e5881; color: white; padding: 50px 40px; text-align: center; }}
-        .price-section h2 {{ color: white; border-bottom-color: #ffcc33; }}
-        .price-box {{
-            background: rgba(255,255,255,0.1);
-            border-radius: 12px;
-            padding: 30px;
-            margin: 30px auto;
-            max-width: 500px;
-        }}
-        .price {{ font-size: 3rem; font-weight: 700; color: #ffcc33; }}
-        .price-detail {{ margin-top: 15px; opacity: 0.9; }}
-
-        /* Timeline */
-        .timeline {{ margin-top: 20px; }}
-        .timeline-item {{
-            display: flex;
-            margin-bottom: 15px;
-            align-items: flex-start;
-        }}
-        .timeline-week {{
-            background: #0e5881;
-            color: white;
-            padding: 8px 15px;
-            border-radius: 20px;
-            font-weight: 600;
-            font-size: 0.85rem;
-            min-width: 80px;
-            text-align: center;
-            margin-right: 15px;
-        }}
-        .timeline-content {{ flex: 1; }}
-        .timeline-content h4 {{ color: #0e5881; margin-bottom: 5px; }}
-
-        /* Services Icons */
-        .service-icon {{
-            width: 60px;
-            height: 60px;
-            background: #e8f4fc;
-            border-radius: 50%;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            margin-bottom: 15px;
-            font-size: 1.5rem;
-        }}
-
-        /* Footer */
-        .footer {{
-            background: #0e5881;
-            color: white;
-            padding: 40px;
-            text-align: center;
-        }}
-        .footer h2 {{ color: white; border: none; margin-bottom: 20px; }}
-        .contact-info {{ display: flex; justify-content: center; gap: 40px; flex-wrap: wrap; }}
-        .contact-item {{ display: flex; align-items: center; gap: 10px; }}
-
-        /* Mobile */
-        @media (max-width: 768px) {{
-            .header {{ padding: 40px 20px; }}
-            .header h1 {{ font-size: 1.6rem; }}
-            .section {{ padding: 30px 20px; }}
-            .card-grid {{ grid-template-columns: 1fr; }}
-            .price {{ font-size: 2.2rem; }}
-            .contact-info {{ flex-direction: column; gap: 15px; }}
-        }}
-
-        @media print {{
-            .section {{ page-break-inside: avoid; }}
-            .price-section {{ page-break-before: always; }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <!-- Header -->
-        <div class="header">
-            <img src="https://mediaforce.ca/wp-content/uploads/2025/10/mf-logo2.png" alt="Mediaforce">
-            <h1>Digital Marketing Proposal</h1>
-            <div class="subtitle">Prepared for {company}</div>
-            <div class="date">{today}</div>
-        </div>
-
-        <!-- Understanding Your Business -->
-        <div class="section">
-            <h2>Understanding Your Business</h2>
-            <div class="info-box">
-                <strong>{company}</strong>'''
-
-    if industry:
-        html += f'<br>Industry: {industry}'
-    if location:
-        html += f'<br>Location: {location}'
-
-    html += f'''
-            </div>
-
-            <h3 style="color: #0e5881; margin: 25px 0 15px;">Current Challenges</h3>
-            <ul>'''
-
-    for challenge in challenges[:5]:
-        html += f'<li>{challenge}</li>'
-
-    html += '''
-            </ul>
-        </div>
-
-        <!-- Your Goals -->
-        <div class="section section-alt">
-            <h2>Your Vision for Success</h2>
-            <div class="card-grid">
-                <div class="card">
-                    <div class="service-icon">🎯</div>
-                    <h3>Short-Term Goals</h3>
-                    <ul>'''
-
-    for goal in goals[:3]:
-        html += f'<li>{goal}</li>'
-
-    html += '''
-                    </ul>
-                </div>
-                <div class="card">
-                    <div class="service-icon">🚀</div>
-                    <h3>Long-Term Vision</h3>
-                    <ul>
-                        <li>Sustainable growth and market leadership</li>
-                        <li>Strong digital brand presence</li>
-                        <li>Predictable lead generation</li>
-                    </ul>
-                </div>
-            </div>
-        </div>
-
-        <!-- Our Approach -->
-        <div class="section section-blue">
-            <h2>Our Approach & Strategy</h2>
-            <div class="card-grid">'''
-
-    if has_google_ads:
-        html += '''
-                <div class="card">
-                    <img src="https://mediaforce.ca/wp-content/uploads/2025/11/guide-google-ads.png" height="40" alt="Google Ads" style="margin-bottom: 15px;">
-                    <h3>Google Ads Management</h3>
-                    <ul>
-                        <li>Strategic keyword targeting</li>
-                        <li>Compelling ad copy creation</li>
-                        <li>Landing page optimization</li>
-                        <li>Conversion tracking setup</li>
-                        <li>Ongoing bid optimization</li>
-                    </ul>
-                </div>'''
-
-    if has_seo:
-        html += '''
-                <div class="card">
-                    <div class="service-icon">🔍</div>
-                    <h3>AI-Friendly SEO</h3>
-                    <ul>
-                        <li>Technical SEO audit & fixes</li>
-                        <li>Content optimization</li>
-                        <li>Local SEO enhancement</li>
-                        <li>Link building outreach</li>
-                        <li>Monthly ranking reports</li>
-                    </ul>
-                </div>'''
-
-    if has_social:
-        html += '''
-                <div class="card">
-                    <div class="service-icon">📱</div>
-                    <h3>Paid Social Media</h3>
-                    <ul>
-                        <li>Facebook & Instagram Ads</li>
-                        <li>LinkedIn advertising</li>
-                        <li>Audience targeting</li>
-                        <li>Creative development</li>
-                        <li>Performance optimization</li>
-                    </ul>
-                </div>'''
-
-    html += '''
-            </div>
-        </div>
-
-        <!-- Timeline -->
-        <div class="section">
-            <h2>Implementation Timeline</h2>
-            <div class="timeline">
-                <div class="timeline-item">
-                    <div class="timeline-week">Week 1</div>
-                    <div class="timeline-content">
-                        <h4>Discovery & Setup</h4>
-                        <p>Kickoff call, account access, tracking setup, strategy alignment</p>
-                    </div>
-                </div>
-                <div class="timeline-item">
-                    <div class="timeline-week">Week 2</div>
-                    <div class="timeline-content">
-                        <h4>Strategy & Creative</h4>
-                        <p>Campaign structure, keyword research, ad copy development</p>
-                    </div>
-                </div>
-                <div class="timeline-item">
-                    <div class="timeline-week">Week 3</div>
-                    <div class="timeline-content">
-                        <h4>Launch & Optimize</h4>
-                        <p>Campaign launch, initial optimizations, performance monitoring</p>
-                    </div>
-                </div>
-                <div class="timeline-item">
-                    <div class="timeline-week">Ongoing</div>
-                    <div class="timeline-content">
-                        <h4>Continuous Improvement</h4>
-                        <p>Weekly optimizations, A/B testing, scaling winning campaigns</p>
-                    </div>
-                </div>
-            </div>
-        </div>
-
-        <!-- Investment -->
-        <div class="price-section">
-            <h2>Your Investment</h2>
-            <div class="price-box">'''
-
-    if has_google_ads:
-        html += '''
-                <img src="https://mediaforce.ca/wp-content/uploads/2025/11/guide-google-ads.png" height="40" alt="Google Ads" style="background: white; padding: 10px; border-radius: 8px; margin-bottom: 20px;">'''
-
-    html += f'''
-                <div class="price">${budget:,}/month</div>
-                <div class="price-detail">
-                    Management Fee: ${management_fee:,}/mo<br>
-                    Ad Spend: ${ad_spend:,}/mo
-                </div>
-            </div>
-            <p style="opacity: 0.9; max-width: 500px; margin: 0 auto;">
-                Includes full campaign management, creative services, weekly reporting, and dedicated account support.
-            </p>
-        </div>
-
-        <!-- Next Steps -->
-        <div class="footer">
-            <h2>Ready to Get Started?</h2>
-            <p style="margin-bottom: 25px;">Let's schedule a call to discuss your goals and answer any questions.</p>
-            <div class="contact-info">
-                <div class="contact-item">📧 jbon@mediaforce.ca</div>
-                <div class="contact-item">📞 613 265 2120</div>
-                <div class="contact-item">🌐 mediaforce.ca</div>
-            </div>
-        </div>
-    </div>
-</body>
-</html>'''
-
-    return html
-
+    context = {
+        'company': company,
+        'industry': industry,
+        'location': location,
+        'today': today,
+        'challenges': challenges,
+        'goals': goals,
+        'has_google_ads': has_google_ads,
+        'has_seo': has_seo,
+        'has_social': has_social,
+        'budget': budget,
+        'management_fee': management_fee,
+        'ad_spend': ad_spend
+    }
+    if stream:
+        return _buffered_stream(_FALLBACK_PROPOSAL_TEMPLATE, context)
+    return _FALLBACK_PROPOSAL_TEMPLATE.render(context)
 
-def generate_simple_preview(data):
-    """Generate a simple HTML preview from form data"""
-    client_name = data.get('client_name', 'Client')
-    industry = data.get('industry', '')
 
-    html = f'''<!DOCTYPE html>
+# Simple preview template, compiled once at import and reused for every request
+PREVIEW_STREAM_BUFFER = 16
+_PREVIEW_ENV = Environment(autoescape=True, auto_reload=False)
+_PREVIEW_ENV.filters['thousands'] = _thousands
+_PREVIEW_TEMPLATE = _PREVIEW_ENV.from_string('''<!DOCTYPE html>
 <html>
 <head>
-    <title>Proposal for {client_name}</title>
+    <title>Proposal for {{ client_name }}</title>
     <style>
-        body {{ font-family: 'Segoe UI', Arial, sans-serif; max-width: 900px; margin: 0 auto; padding: 40px; color: #333; }}
-        .header {{ background: #0e5881; color: white; padding: 40px; text-align: center; margin: -40px -40px 40px; }}
-        .header h1 {{ margin: 0; font-size: 2rem; }}
-        .header p {{ margin: 10px 0 0; opacity: 0.9; }}
-        .section {{ margin: 30px 0; padding: 20px; background: #f8f9fa; border-radius: 8px; }}
-        .section h2 {{ color: #0e5881; margin-top: 0; border-bottom: 2px solid #ffcc33; padding-bottom: 10px; }}
-        .info-box {{ background: #e8f4fc; padding: 15px; border-radius: 6px; margin: 15px 0; }}
-        .price-box {{ background: #0e5881; color: white; padding: 20px; border-radius: 8px; text-align: center; }}
-        .price {{ font-size: 2rem; font-weight: bold; color: #ffcc33; }}
-        ul {{ padding-left: 20px; }}
-        li {{ margin: 8px 0; }}
+        body { font-family: 'Segoe UI', Arial, sans-serif; max-width: 900px; margin: 0 auto; padding: 40px; color: #333; }
+        .header { background: #0e5881; color: white; padding: 40px; text-align: center; margin: -40px -40px 40px; }
+        .header h1 { margin: 0; font-size: 2rem; }
+        .header p { margin: 10px 0 0; opacity: 0.9; }
+        .section { margin: 30px 0; padding: 20px; background: #f8f9fa; border-radius: 8px; }
+        .section h2 { color: #0e5881; margin-top: 0; border-bottom: 2px solid #ffcc33; padding-bottom: 10px; }
+        .info-box { background: #e8f4fc; padding: 15px; border-radius: 6px; margin: 15px 0; }
+        .price-box { background: #0e5881; color: white; padding: 20px; border-radius: 8px; text-align: center; }
+        .price { font-size: 2rem; font-weight: bold; color: #ffcc33; }
+        ul { padding-left: 20px; }
+        li { margin: 8px 0; }
     </style>
 </head>
 <body>
     <div class="header">
         <img src="https://mediaforce.ca/wp-content/uploads/2025/10/mf-logo2.png" height="50" alt="Mediaforce">
         <h1>Digital Marketing Proposal</h1>
-        <p>Prepared for {client_name}</p>
+        <p>Prepared for {{ client_name }}</p>
     </div>
 
     <div class="section">
         <h2>Understanding Your Business</h2>
         <div class="info-box">
-            <strong>Industry:</strong> {industry}<br>
-            <strong>Location:</strong> {data.get('location', 'N/A')}
+            <strong>Industry:</strong> {{ industry }}<br>
+            <strong>Location:</strong> {{ location }}
         </div>
         <p><strong>Current Challenges:</strong></p>
-        <ul>'''
-
-    pain_points = data.get('pain_points', '').split('\n') if data.get('pain_points') else ['Increase online visibility']
-    for point in pain_points:
-        if point.strip():
-            html += f'<li>{point.strip()}</li>'
-
-    html += '''</ul>
+        <ul>{% for point in pain_points %}<li>{{ point }}</li>{% endfor %}</ul>
     </div>
 
     <div class="section">
         <h2>Your Goals</h2>
         <p><strong>Short-Term (3-6 months):</strong></p>
-        <ul>'''
-
-    short_goals = data.get('short_term_goals', '').split('\n') if data.get('short_term_goals') else ['Increase traffic']
-    for goal in short_goals:
-        if goal.strip():
-            html += f'<li>{goal.strip()}</li>'
-
-    html += '''</ul>
+        <ul>{% for goal in short_goals %}<li>{{ goal }}</li>{% endfor %}</ul>
     </div>
 
     <div class="section">
         <h2>Investment</h2>
         <div class="price-box">
-            <p>Monthly Investment</p>'''
-
-    retainer = int(data.get('monthly_retainer', 899) or 899)
-    ad_spend = int(data.get('ad_spend', 1500) or 1500)
-    total = retainer + ad_spend
-
-    html += f'''<div class="price">${total:,}/month</div>
-            <p>Management Fee: ${retainer:,} | Ad Spend: ${ad_spend:,}</p>
+            <p>Monthly Investment</p><div class="price">${{ total|thousands }}/month</div>
+            <p>Management Fee: ${{ retainer|thousands }} | Ad Spend: ${{ ad_spend|thousands }}</p>
         </div>
     </div>
 
@@ -1587,60 +1209,184 @@ def generate_simple_preview(data):
         </p>
     </div>
 </body>
-</html>'''
+</html>''')
+
+
+def _preview_context(data):
+    """Build the template variables for the simple preview from form data"""
+    pain_points = _lines(data, 'pain_points') if data.get('pain_points') else ['Increase online visibility']
+    short_goals = _lines(data, 'short_term_goals') if data.get('short_term_goals') else ['Increase traffic']
+
+    retainer = _int(data, 'monthly_retainer', 899)
+    ad_spend = _int(data, 'ad_spend', 1500)
+
+    return {
+        'client_name': data.get('client_name', 'Client'),
+        'industry': data.get('industry', ''),
+        'location': data.get('location', 'N/A'),
+        'pain_points': pain_points,
+        'short_goals': short_goals,
+        'retainer': retainer,
+        'ad_spend': ad_spend,
+        'total': retainer + ad_spend
+    }
+
+
+def generate_simple_preview(data):
+    """Generate a simple HTML preview from form data"""
+    return _PREVIEW_TEMPLATE.render(_preview_context(data))
+
+
+def stream_simple_preview(data):
+    """Yield the simple HTML preview in chunks for a streaming response"""
+    stream = _PREVIEW_TEMPLATE.stream(_preview_context(data))
+    stream.enable_buffering(PREVIEW_STREAM_BUFFER)
+    return stream
+
+
+# Live preview cache - the same form is previewed many times while it is being edited
+PREVIEW_CACHE_SIZE = 256
+_preview_cache = LRUCache(PREVIEW_CACHE_SIZE)
 
+
+def _metadata_key(data):
+    """Stable digest of a metadata dict, independent of key order"""
+    if HAS_ORJSON:
+        payload = orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    else:
+        payload = json.dumps(data, sort_keys=True).encode()
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def cached_simple_preview(data):
+    """Return generate_simple_preview(data), reusing the HTML for repeated metadata"""
+    key = _metadata_key(data)
+    html = _preview_cache.get(key)
+    if html is None:
+        html = generate_simple_preview(data)
+        _preview_cache.set(key, html)
     return html
 
 
-def build_metadata_from_form(form):
-    """Convert form data to metadata structure"""
+# Assembled proposals depend on today's date for their defaults, so it is part of the key
+PROPOSAL_CACHE_SIZE = 128
+_proposal_cache = LRUCache(PROPOSAL_CACHE_SIZE)
 
-    # Parse services
-    services = {
+
+def cached_assembled_proposal(data):
+    """Return _ASSEMBLER.assemble(data), reusing the HTML for repeated metadata on the same day"""
+    key = (_metadata_key(data), _today_iso())
+    html = _proposal_cache.get(key)
+    if html is None:
+        html = _ASSEMBLER.assemble(data)
+        _proposal_cache.set(key, html)
+    return html
+
+
+# (expiry timestamp, {format: formatted date}) - swapped as one tuple at midnight so
+# threads never see a stale mapping under a new expiry
+_today = (0.0, {})
+
+
+def _today_str(fmt):
+    """Today's local date formatted with fmt, reformatted only when the day rolls over"""
+    global _today
+    expires, formatted = _today
+    if time.time() >= expires:
+        now = datetime.now()
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        formatted = {}
+        _today = (tomorrow.timestamp(), formatted)
+    value = formatted.get(fmt)
+    if value is None:
+        value = formatted[fmt] = datetime.now().strftime(fmt)
+    return value
+
+
+def _today_iso():
+    """Today's local date as YYYY-MM-DD"""
+    return _today_str('%Y-%m-%d')
+
+
+def _lines(form, key):
+    """Return the stripped, non-empty lines of a multiline form or metadata field"""
+    value = form.get(key)
+    return [line for line in map(str.strip, value.splitlines()) if line] if value else []
+
+
+def _csv(form, key):
+    """Return the stripped, non-empty items of a comma-separated form field"""
+    value = form.get(key)
+    return [item for item in map(str.strip, value.split(',')) if item] if value else []
+
+
+def _int(form, key, default=0):
+    """Return a numeric form field as an int, or default when it is missing or empty"""
+    value = form.get(key)
+    return int(value) if value else default
+
+
+def _parse_services(form):
+    """Build the services pillars from the form.
+
+    Built fresh on every call: the dict goes straight into per-request metadata,
+    so a shared cached copy could leak edits between requests.
+    """
+    return {
         'google_ads': {
             'enabled': form.get('google_ads_enabled') == 'on',
-            'monthly_budget': int(form.get('google_ads_budget', 0) or 0)
+            'monthly_budget': _int(form, 'google_ads_budget')
         },
         'seo': {
             'enabled': form.get('seo_enabled') == 'on',
-            'monthly_fee': int(form.get('seo_fee', 0) or 0)
+            'monthly_fee': _int(form, 'seo_fee')
         },
         'paid_social': {
             'enabled': form.get('paid_social_enabled') == 'on',
-            'monthly_budget': int(form.get('paid_social_budget', 0) or 0),
+            'monthly_budget': _int(form, 'paid_social_budget'),
             'platforms': form.getlist('social_platforms')
         }
     }
 
+
+def build_metadata_from_form(form):
+    """Convert form data to metadata structure"""
+
+    # Parse services
+    services = _parse_services(form)
+
+    monthly_retainer = _int(form, 'monthly_retainer')
+    ad_spend = _int(form, 'ad_spend')
+
     metadata = {
         'metadata': {
             'client_name': form.get('client_name', ''),
-            'proposal_date': form.get('proposal_date', datetime.now().strftime('%Y-%m-%d')),
+            'proposal_date': form.get('proposal_date') or _today_iso(),
             'analyst': form.get('analyst', 'The Mediaforce Team'),
             'proposal_type': 'Digital Marketing Strategy Proposal'
         },
         'client_context': {
             'industry': form.get('industry', ''),
-            'brands': [b.strip() for b in form.get('brands', '').split(',') if b.strip()],
+            'brands': _csv(form, 'brands'),
             'location': form.get('location', ''),
             'current_situation': {
                 'description': form.get('situation_description', ''),
-                'pain_points': [p.strip() for p in form.get('pain_points', '').split('\n') if p.strip()]
+                'pain_points': _lines(form, 'pain_points')
             },
             'success_definition': {
-                'short_term': [g.strip() for g in form.get('short_term_goals', '').split('\n') if g.strip()],
-                'long_term': [g.strip() for g in form.get('long_term_goals', '').split('\n') if g.strip()]
+                'short_term': _lines(form, 'short_term_goals'),
+                'long_term': _lines(form, 'long_term_goals')
             },
             'target_audience': {
-                'demographics': [d.strip() for d in form.get('demographics', '').split('\n') if d.strip()],
-                'psychographics': [p.strip() for p in form.get('psychographics', '').split('\n') if p.strip()],
-                'behaviors': [b.strip() for b in form.get('behaviors', '').split('\n') if b.strip()]
+                'demographics': _lines(form, 'demographics'),
+                'psychographics': _lines(form, 'psychographics'),
+                'behaviors': _lines(form, 'behaviors')
             }
         },
         'competitive_landscape': {
             'market_overview': form.get('market_overview', ''),
             'competitors': parse_competitors(form.get('competitors', '')),
-            'opportunities': [o.strip() for o in form.get('opportunities', '').split('\n') if o.strip()]
+            'opportunities': _lines(form, 'opportunities')
         },
         'strategy': {
             'pillars': services
@@ -1648,9 +1394,9 @@ def build_metadata_from_form(form):
         'investment': {
             'packages': [{
                 'name': 'DIGITAL MARKETING PACKAGE',
-                'monthly_retainer': int(form.get('monthly_retainer', 0) or 0),
-                'ad_spend': int(form.get('ad_spend', 0) or 0),
-                'total_monthly': int(form.get('monthly_retainer', 0) or 0) + int(form.get('ad_spend', 0) or 0)
+                'monthly_retainer': monthly_retainer,
+                'ad_spend': ad_spend,
+                'total_monthly': monthly_retainer + ad_spend
             }]
         },
         'next_steps': {
@@ -1668,19 +1414,11 @@ def build_metadata_from_form(form):
 
 def parse_competitors(competitors_text):
     """Parse competitors from text input"""
-    competitors = []
-    for line in competitors_text.split('\n'):
-        line = line.strip()
-        if line:
-            competitors.append({
-                'name': line,
-                'strengths': [],
-                'weaknesses': []
-            })
-    return competitors
+    return [
+        {'name': name, 'strengths': [], 'weaknesses': []}
+        for name in filter(None, map(str.strip, competitors_text.splitlines()))
+    ]
 
 
 if __name__ == '__main__':
-    port = int(os.environ.get('PORT', 5000))
-    debug = os.environ.get('FLASK_ENV') == 'development'
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    app.run(host='0.0.0.0', port=PORT, debug=IS_DEV)
@@ -3,11 +3,33 @@
 Proposal Assembler - Inserts generated fragments into BMW-style template
 """
 
+import re
 from pathlib import Path
 from typing import Dict
 from datetime import datetime
 
 
+# Section slots in template order: (slot name, data key, placeholder when missing)
+SLOTS = (
+    ('EXECUTIVE_SUMMARY', 'executive_summary', '<p>Executive summary not generated</p>'),
+    ('YOUR_BUSINESS', 'your_business', '<p>Your business section not generated</p>'),
+    ('COMPETITIVE_ANALYSIS', 'competitive_analysis', '<p>Competitive analysis not generated</p>'),
+    ('STRATEGY', 'strategy', '<p>Strategy section not generated</p>'),
+    ('SUCCESS_METRICS', 'success_metrics', '<p>Success metrics not generated</p>'),
+    ('TIMELINE', 'timeline', '<p>Timeline not generated</p>'),
+    ('INVESTMENT', 'investment', '<p>Investment section not generated</p>'),
+    ('NEXT_STEPS', 'next_steps', '<p>Next steps not generated</p>'),
+)
+METADATA_PLACEHOLDERS = ('{{CLIENT}}', '{{PROPOSAL_TYPE}}', '{{ANALYST}}', '{{PROPOSAL_DATE}}', '{{YEAR}}')
+CSS_LINK = '<link rel="stylesheet" href="proposal.css">'
+
+# Every placeholder the template can contain, captured so re.split keeps them
+PLACEHOLDER_RE = re.compile('(%s)' % '|'.join(
+    re.escape(token)
+    for token in METADATA_PLACEHOLDERS + tuple(f'<!-- SLOT: {name} -->' for name, _, _ in SLOTS)
+))
+
+
 class ProposalAssembler:
     """Assembles validated fragments into final HTML"""
 
@@ -18,64 +40,26 @@ class ProposalAssembler:
         with open(css_path) as f:
             self.css = f.read()
 
+        # Embed the CSS and split the template around its placeholders once, so
+        # each proposal is a single join of static text and filled values
+        page = self.template.replace(CSS_LINK, f'<style>{self.css}</style>')
+        self.parts = PLACEHOLDER_RE.split(page)
+
     def assemble(self, data: Dict) -> str:
         """Assemble final HTML from generated fragments"""
-
-        html = self.template
-
-        # Replace metadata placeholders
         metadata = data.get('metadata', {})
-        html = html.replace('{{CLIENT}}', metadata.get('client_name', 'Client Name'))
-        html = html.replace('{{PROPOSAL_TYPE}}', metadata.get('proposal_type', 'Digital Marketing Proposal'))
-        html = html.replace('{{ANALYST}}', metadata.get('analyst', 'The Mediaforce Team'))
-        html = html.replace('{{PROPOSAL_DATE}}', metadata.get('proposal_date', datetime.now().strftime('%Y-%m-%d')))
-        html = html.replace('{{YEAR}}', str(datetime.now().year))
-
-        # Replace section slots
-        html = html.replace(
-            '<!-- SLOT: EXECUTIVE_SUMMARY -->',
-            data.get('executive_summary', '<p>Executive summary not generated</p>')
-        )
-
-        html = html.replace(
-            '<!-- SLOT: YOUR_BUSINESS -->',
-            data.get('your_business', '<p>Your business section not generated</p>')
-        )
-
-        html = html.replace(
-            '<!-- SLOT: COMPETITIVE_ANALYSIS -->',
-            data.get('competitive_analysis', '<p>Competitive analysis not generated</p>')
-        )
-
-        html = html.replace(
-            '<!-- SLOT: STRATEGY -->',
-            data.get('strategy', '<p>Strategy section not generated</p>')
-        )
-
-        html = html.replace(
-            '<!-- SLOT: SUCCESS_METRICS -->',
-            data.get('success_metrics', '<p>Success metrics not generated</p>')
-        )
-
-        html = html.replace(
-            '<!-- SLOT: TIMELINE -->',
-            data.get('timeline', '<p>Timeline not generated</p>')
-        )
-
-        html = html.replace(
-            '<!-- SLOT: INVESTMENT -->',
-            data.get('investment', '<p>Investment section not generated</p>')
-        )
-
-        html = html.replace(
-            '<!-- SLOT: NEXT_STEPS -->',
-            data.get('next_steps', '<p>Next steps not generated</p>')
-        )
-
-        # Embed CSS
-        html = html.replace('<link rel="stylesheet" href="proposal.css">', f'<style>{self.css}</style>')
-
-        return html
+        values = {
+            '{{CLIENT}}': metadata.get('client_name', 'Client Name'),
+            '{{PROPOSAL_TYPE}}': metadata.get('proposal_type', 'Digital Marketing Proposal'),
+            '{{ANALYST}}': metadata.get('analyst', 'The Mediaforce Team'),
+            '{{PROPOSAL_DATE}}': metadata.get('proposal_date', datetime.now().strftime('%Y-%m-%d')),
+            '{{YEAR}}': str(datetime.now().year),
+        }
+        for name, key, default in SLOTS:
+            values[f'<!-- SLOT: {name} -->'] = data.get(key, default)
+
+        # re.split alternates static text and captured placeholders
+        return ''.join(values[part] if i % 2 else part for i, part in enumerate(self.parts))
 
 
 def main():
@@ -5,6 +5,7 @@ Enforces structure, prevents redundancy, guarantees quality
 """
 
 import os
+import re
 import json
 import sys
 from pathlib import Path
@@ -14,6 +15,11 @@ from validator import FragmentValidator
 from evidence_mapper import EvidenceMapper
 
 
+# Patterns for parsing LLM responses and the raw findings summary, compiled once
+JSON_FENCE_RE = re.compile(r'```(?:json)?\s*(\{.*\})\s*```', re.DOTALL)
+FINDING_RE = re.compile(r'(\d+)\.\s+([A-Z]+-\d+):\s+([^\n]+)\n\s+CVSS:\s+([\d.]+)\s+\|\s+(CWE-\d+)')
+
+
 # Global system message for all LLM calls
 SYSTEM_MESSAGE = """You are generating HTML fragments for a penetration test report.
 
@@ -133,8 +139,7 @@ Generate the outline now:"""
             # Extract JSON if wrapped in code fences
             json_match = response
             if '```' in response:
-                import re
-                json_match = re.search(r'```(?:json)?\s*(\{.*\})\s*```', response, re.DOTALL)
+                json_match = JSON_FENCE_RE.search(response)
                 if json_match:
                     json_match = json_match.group(1)
 
@@ -282,8 +287,7 @@ Generate the JSON:"""
         try:
             # Extract JSON
             if '```' in response:
-                import re
-                json_match = re.search(r'```(?:json)?\s*(\{.*\})\s*```', response, re.DOTALL)
+                json_match = JSON_FENCE_RE.search(response)
                 if json_match:
                     response = json_match.group(1)
 
@@ -357,8 +361,7 @@ Generate the JSON:"""
         try:
             # Extract JSON
             if '```' in response:
-                import re
-                json_match = re.search(r'```(?:json)?\s*(\{.*\})\s*```', response, re.DOTALL)
+                json_match = JSON_FENCE_RE.search(response)
                 if json_match:
                     response = json_match.group(1)
 
@@ -375,11 +378,7 @@ Generate the JSON:"""
         findings_text = data['findings_raw']
 
         # Parse individual findings from summary
-        import re
-        finding_blocks = re.findall(
-            r'(\d+)\.\s+([A-Z]+-\d+):\s+([^\n]+)\n\s+CVSS:\s+([\d.]+)\s+\|\s+(CWE-\d+)',
-            findings_text
-        )
+        finding_blocks = FINDING_RE.findall(findings_text)
 
         print(f"  Found {len(finding_blocks)} findings to generate")
 
@@ -0,0 +1,27 @@
+"""
+Gunicorn configuration for the Mediaforce Proposal Generator
+
+AI generation spends most of its time waiting on the Anthropic API, so the
+default worker class is gevent: each worker multiplexes many in-flight
+requests instead of pinning a thread per call. Gunicorn's gevent worker
+monkey-patches the standard library before the app is imported, so the
+Anthropic SDK's HTTP client becomes cooperative without changes to app.py.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Used only when GUNICORN_WORKER_CLASS=gthread
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# With gevent workers the timeout is only a heartbeat watchdog: a request waiting on
+# the Anthropic API yields to the worker's event loop and never trips it. It bounds
+# request duration only for GUNICORN_WORKER_CLASS=gthread (or sync) workers, where an
+# AI proposal - three parallel shards of up to 3000 tokens (AI_SHARD_MAX_TOKENS),
+# lasting as long as the slowest one - can exceed the 30s default. 120s leaves headroom
+# for API latency spikes and the SDK's retries.
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))